@@ -0,0 +1,5 @@
+# asgi.py
+# Entry point for ASGI servers, e.g.:
+#   hypercorn asgi:app --bind 127.0.0.1:31337 --keep-alive 30
+# Keep a single worker: models and memory live in the server process.
+from slop_with_models import app
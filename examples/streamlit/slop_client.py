@@ -0,0 +1,181 @@
+# slop_client.py
+"""HTTP client for the SLOP server, shared by the Streamlit UI."""
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+import orjson
+import requests
+from requests import RequestException
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+BASE_URL = os.environ.get("SLOP_BASE_URL", "http://localhost:31337")
+MODELS_URL = f"{BASE_URL}/models"
+CHAT_URL = f"{BASE_URL}/chat"
+TOOLS_URL = f"{BASE_URL}/tools"
+MEMORY_URL = f"{BASE_URL}/memory"
+RESOURCES_URL = f"{BASE_URL}/resources"
+PAY_URL = f"{BASE_URL}/pay"
+DOCS_URL = f"{BASE_URL}/openapi/"
+
+
+def orjson_hook(response, *args, **kwargs):
+    """Response hook that makes response.json() decode with orjson."""
+
+    def json(**kwargs):
+        try:
+            return orjson.loads(response.content)
+        except orjson.JSONDecodeError as e:
+            # Match requests, so callers' RequestException handlers still apply
+            raise requests.JSONDecodeError(e.msg, e.doc, e.pos)
+
+    response.json = json
+
+
+@st.cache_resource
+def get_session():
+    """Shared HTTP session so every rerun reuses pooled keep-alive connections."""
+    session = requests.Session()
+    # Retry gateway errors with a short backoff. POSTs (chat, pay, tool calls) are
+    # not idempotent, so only connection failures are retried for them.
+    retries = Retry(
+        total=2,
+        backoff_factor=0.1,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(["GET", "DELETE"]),
+    )
+    session.mount(
+        "http://",
+        HTTPAdapter(max_retries=retries, pool_connections=20, pool_maxsize=20),
+    )
+    session.headers.update({"Content-Type": "application/json"})
+    session.hooks["response"].append(orjson_hook)
+    return session
+
+
+SESSION = get_session()
+
+
+# Models change when the server rediscovers endpoints; tools and resources are static
+@st.cache_data(ttl=60, show_spinner=False)
+def fetch_models():
+    response = SESSION.get(MODELS_URL, timeout=5)
+    response.raise_for_status()
+    return response.json()["models"]
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def fetch_tools():
+    response = SESSION.get(TOOLS_URL, timeout=5)
+    response.raise_for_status()
+    return response.json()["tools"]
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def fetch_resources():
+    response = SESSION.get(RESOURCES_URL, timeout=5)
+    response.raise_for_status()
+    return response.json()["resources"]
+
+
+def clear_listings():
+    fetch_models.clear()
+    fetch_tools.clear()
+    fetch_resources.clear()
+
+
+def prefetch_listings():
+    """Warm the model, tool and resource caches with overlapping requests.
+
+    Errors are ignored here; each page reports them when it reads its listing.
+    """
+    fetchers = (fetch_models, fetch_tools, fetch_resources)
+    with ThreadPoolExecutor(
+        max_workers=len(fetchers),
+        initializer=add_script_run_ctx,
+        initargs=(None, get_script_run_ctx()),
+    ) as executor:
+        for fetch in fetchers:
+            executor.submit(fetch)
+
+
+def stream_chat(messages, model):
+    """Yield the assistant's reply as it arrives over the /chat event stream."""
+    with SESSION.post(
+        CHAT_URL,
+        json={"messages": messages, "model": model, "stream": True},
+        stream=True,
+        timeout=(5, 60),  # Connect timeout, then the longest gap between events
+    ) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line.startswith(b"data: "):
+                continue
+            data = line[len(b"data: ") :]
+            if data == b"[DONE]":
+                break
+            try:
+                event = orjson.loads(data)
+                if "error" in event:
+                    raise RequestException(event["error"])
+                content = event["choices"][0]["delta"]["content"]
+            except (orjson.JSONDecodeError, LookupError, TypeError) as e:
+                # Malformed events surface like any other request failure
+                raise RequestException(f"Malformed chat event: {data!r}") from e
+            yield content
+
+
+def call_tool(tool_id, payload):
+    response = SESSION.post(f"{TOOLS_URL}/{tool_id}", json=payload, timeout=5)
+    response.raise_for_status()
+    return response.json()["result"]
+
+
+# Memory reads; writes from this client clear both caches
+@st.cache_data(ttl=30, show_spinner=False)
+def fetch_memory_keys():
+    response = SESSION.get(MEMORY_URL, timeout=5)
+    response.raise_for_status()
+    return response.json()["keys"]
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def fetch_memory(key):
+    response = SESSION.get(f"{MEMORY_URL}/{key}", timeout=5)
+    response.raise_for_status()
+    return response.json()["value"]
+
+
+def clear_memory_cache():
+    fetch_memory_keys.clear()
+    fetch_memory.clear()
+
+
+def store_memory(key, value):
+    """Store a value and return the server's updated key list."""
+    response = SESSION.post(MEMORY_URL, json={"key": key, "value": value}, timeout=5)
+    response.raise_for_status()
+    clear_memory_cache()
+    return response.json()["keys"]
+
+
+def delete_memory(key):
+    """Delete a key and return the server's updated key list."""
+    response = SESSION.delete(f"{MEMORY_URL}/{key}", timeout=5)
+    response.raise_for_status()
+    clear_memory_cache()
+    return response.json()["keys"]
+
+
+def fetch_resource(resource_id):
+    response = SESSION.get(f"{RESOURCES_URL}/{resource_id}", timeout=5)
+    response.raise_for_status()
+    return response.json()
+
+
+def pay(amount):
+    response = SESSION.post(PAY_URL, json={"amount": amount}, timeout=5)
+    response.raise_for_status()
+    return response.json()
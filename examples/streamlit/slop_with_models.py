@@ -1,10 +1,18 @@
 # slop_with_models.py
-from flask import Flask, request, jsonify
-from datetime import datetime
+from quart import Blueprint, Quart, Response, request
+from functools import lru_cache
+import ast
+import asyncio
+import json
 import os
-from openai import OpenAI
+import re
+import time
+from cachetools import LRUCache
+from openai import AsyncOpenAI
 import logging
-from flask_swagger_ui import get_swaggerui_blueprint
+import math
+import operator
+import orjson
 
 # Configure logging
 logging.basicConfig(
@@ -12,24 +20,53 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-app = Flask(__name__)
+app = Quart(__name__)
 
 # Swagger UI setup
 SWAGGER_URL = "/openapi"  # URL for Swagger UI
 API_URL = "/static/openapi.yaml"  # Path to the OpenAPI spec file
-swaggerui_blueprint = get_swaggerui_blueprint(
-    SWAGGER_URL, API_URL, config={"app_name": "SLOP API"}
-)
-app.register_blueprint(swaggerui_blueprint, url_prefix=SWAGGER_URL)
+SWAGGER_UI_HTML = f"""<!DOCTYPE html>
+<html>
+<head>
+  <title>SLOP API</title>
+  <link rel="stylesheet" href="https://unpkg.com/swagger-ui-dist@5/swagger-ui.css">
+</head>
+<body>
+  <div id="swagger-ui"></div>
+  <script src="https://unpkg.com/swagger-ui-dist@5/swagger-ui-bundle.js"></script>
+  <script>SwaggerUIBundle({{url: "{API_URL}", dom_id: "#swagger-ui"}});</script>
+</body>
+</html>
+"""
+
+
+@app.route(f"{SWAGGER_URL}/", methods=["GET"])
+async def swagger_ui():
+    return SWAGGER_UI_HTML
+
 
 # Global model-to-client map and memory
 MODEL_CLIENT_MAP = {}
-memory = {}
+MODEL_IDS_CACHE = ()  # Model ids in discovery order, refreshed with the map
+DEFAULT_MODEL = None  # First discovered model, refreshed with the map
+_MODELS_JSON = b'{"models":[]}'  # Serialized /models body, refreshed with the map
+# On-disk copy of the model map, served on startup while it is refreshed
+MODEL_CACHE_PATH = os.path.expanduser("~/.slop/models.json")
+MODEL_CACHE_TTL = 24 * 60 * 60  # Seconds
+# Bounded so clients cannot grow it without limit; least recently used keys go first.
+# Handlers all run on the event loop thread, so no lock is needed around it.
+memory = LRUCache(maxsize=100_000)
 
 # Load endpoints
+# Single pass over the environment; sorting keeps the numeric endpoint order
+ENDPOINT_VAR_PATTERN = re.compile(r"^MODEL_ENDPOINT_(0|[1-9]\d*)$")
 ENDPOINTS = []
-for i in range(1000):
-    endpoint = os.getenv(f"MODEL_ENDPOINT_{i}")
+for i, key in sorted(
+    (int(m.group(1)), key)
+    for key in os.environ
+    if (m := ENDPOINT_VAR_PATTERN.match(key))
+):
+    endpoint = os.environ[key]
     if endpoint:
         ENDPOINTS.append(
             {
@@ -40,40 +77,192 @@ for i in range(1000):
         )
 
 
-def initialize_model_map():
+async def probe_endpoint(ep, semaphore):
+    """Return (endpoint_name, client, model list or the exception raised)."""
+    endpoint_name = ep["name"]
+    async with semaphore:
+        logger.info("Querying endpoint: %s (%s)", endpoint_name, ep["base_url"])
+        try:
+            client = AsyncOpenAI(base_url=ep["base_url"], api_key=ep["api_key"])
+            model_list = (await client.models.list()).data
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "%s returned models: %s",
+                    endpoint_name,
+                    [m.id for m in model_list],
+                )
+            return endpoint_name, client, model_list
+        except Exception as e:
+            return endpoint_name, None, e
+
+
+def publish_model_map(model_map):
+    """Swap in a {model_id: client} map and refresh the values derived from it."""
+    global MODEL_IDS_CACHE, DEFAULT_MODEL, _MODELS_JSON
     MODEL_CLIENT_MAP.clear()
+    MODEL_CLIENT_MAP.update(model_map)
+    MODEL_IDS_CACHE = tuple(MODEL_CLIENT_MAP)
+    DEFAULT_MODEL = MODEL_IDS_CACHE[0] if MODEL_IDS_CACHE else None
+    _MODELS_JSON = orjson.dumps({"models": MODEL_IDS_CACHE})
+    logger.info("Loaded models: %s", list(MODEL_IDS_CACHE))
+
+
+def save_model_cache(model_endpoints):
+    """Write [[model_id, endpoint_name, base_url], ...] to the disk cache.
+
+    API keys are not written; they are read from the environment on load.
+    """
+    tmp_path = f"{MODEL_CACHE_PATH}.tmp"
+    try:
+        os.makedirs(os.path.dirname(MODEL_CACHE_PATH), exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps({"models": model_endpoints}))
+        os.replace(tmp_path, MODEL_CACHE_PATH)
+    except OSError as e:
+        logger.warning("Could not write model cache %s: %s", MODEL_CACHE_PATH, e)
+
+
+def load_model_cache():
+    """Publish the model map from the disk cache if it is fresh enough.
+
+    Entries whose endpoint is no longer configured, or now points elsewhere, are
+    dropped. Returns True if any model was loaded.
+    """
+    endpoints = {ep["name"]: ep for ep in ENDPOINTS}
+    clients = {}
+    model_map = {}
+    try:
+        if time.time() - os.path.getmtime(MODEL_CACHE_PATH) > MODEL_CACHE_TTL:
+            return False
+        with open(MODEL_CACHE_PATH, "rb") as f:
+            cached = orjson.loads(f.read())["models"]
+        for model_id, endpoint_name, base_url in cached:
+            ep = endpoints.get(endpoint_name)
+            if ep is None or ep["base_url"] != base_url or model_id in model_map:
+                continue
+            if endpoint_name not in clients:
+                clients[endpoint_name] = AsyncOpenAI(
+                    base_url=base_url, api_key=ep["api_key"]
+                )
+            model_map[model_id] = clients[endpoint_name]
+    except FileNotFoundError:
+        return False
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning("Ignoring unreadable model cache %s: %s", MODEL_CACHE_PATH, e)
+        return False
+    if not model_map:
+        return False
+    logger.info("Serving cached model map from %s", MODEL_CACHE_PATH)
+    publish_model_map(model_map)
+    return True
+
+
+async def initialize_model_map():
+    """Query every endpoint, then publish and cache the discovered models.
+
+    If no endpoint answers, the current (possibly cached) map is kept.
+    """
     logger.info("Initializing model map...")
     if not ENDPOINTS:
         logger.warning("No endpoints configured.")
         return
-    for ep in ENDPOINTS:
-        base_url = ep["base_url"]
-        api_key = ep["api_key"]
-        endpoint_name = ep["name"]
-        logger.info(f"Querying endpoint: {endpoint_name} ({base_url})")
-        client = OpenAI(base_url=base_url, api_key=api_key)
-        try:
-            response = client.models.list()
-            model_list = response.data
-            logger.debug(
-                f"{endpoint_name} returned models: {[m.id for m in model_list]}"
-            )
-        except Exception as e:
+    # Probe endpoints concurrently; gather keeps results in ENDPOINTS order
+    semaphore = asyncio.Semaphore(32)
+    results = await asyncio.gather(*(probe_endpoint(ep, semaphore) for ep in ENDPOINTS))
+    model_map = {}
+    model_endpoints = []
+    for ep, (endpoint_name, client, model_list) in zip(ENDPOINTS, results):
+        if isinstance(model_list, Exception):
             logger.error(
-                f"Skipping, Failed to list models for {endpoint_name}: {str(e)}"
+                "Skipping, Failed to list models for %s: %s", endpoint_name, model_list
             )
             continue
         for m in model_list:
             model_id = m.id
             if model_id:
-                if model_id in MODEL_CLIENT_MAP:
-                    logger.warning(f"Duplicate model ID '{model_id}' found.")
+                if model_id in model_map:
+                    logger.warning("Duplicate model ID '%s' found.", model_id)
                 else:
-                    MODEL_CLIENT_MAP[model_id] = client
-                    logger.info(f"Added model '{model_id}'")
+                    model_map[model_id] = client
+                    model_endpoints.append([model_id, endpoint_name, ep["base_url"]])
+                    logger.info("Added model '%s'", model_id)
             else:
-                logger.warning(f"Encountered model with no ID from {endpoint_name}")
-    logger.info(f"Loaded models: {list(MODEL_CLIENT_MAP.keys())}")
+                logger.warning("Encountered model with no ID from %s", endpoint_name)
+    if not model_map and MODEL_CLIENT_MAP:
+        logger.warning("No models discovered; keeping the current model map.")
+        return
+    publish_model_map(model_map)
+    if model_map:
+        save_model_cache(model_endpoints)
+
+
+@app.before_serving
+async def startup():
+    if load_model_cache():
+        # Serve the cached map right away and revalidate it in the background
+        app.add_background_task(initialize_model_map)
+    else:
+        await initialize_model_map()
+
+
+# Calculator: arithmetic only, evaluated node by node so expressions never reach
+# eval() and cannot build integers large enough to stall the event loop
+_CALCULATOR_BINOPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+_CALCULATOR_UNARYOPS = {ast.USub: operator.neg, ast.UAdd: operator.pos}
+MAX_RESULT_BITS = 4096
+MAX_EXPRESSION_LENGTH = 1000  # Deeply nested input exhausts the parser
+
+
+def _check_size(op, left, right):
+    """Reject products and powers whose integer result would exceed MAX_RESULT_BITS."""
+    if not (isinstance(left, int) and isinstance(right, int)):
+        return
+    if op is ast.Mult:
+        bits = left.bit_length() + right.bit_length()
+    elif op is ast.Pow and abs(left) > 1 and right > 0:
+        bits = left.bit_length() * right  # Upper bound on the result's bit length
+    else:
+        return
+    if bits > MAX_RESULT_BITS:
+        raise ValueError("Result too large")
+
+
+def _check_result(value):
+    """Reject complex results (e.g. (-8)**0.5) and inf/nan, which JSON can't carry."""
+    if isinstance(value, complex) or (
+        isinstance(value, float) and not math.isfinite(value)
+    ):
+        raise ValueError("Result is not a finite real number")
+    return value
+
+
+def _eval_node(node):
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return _check_result(node.value)
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _CALCULATOR_UNARYOPS:
+        return _CALCULATOR_UNARYOPS[type(node.op)](_eval_node(node.operand))
+    if isinstance(node, ast.BinOp) and type(node.op) in _CALCULATOR_BINOPS:
+        left = _eval_node(node.left)
+        right = _eval_node(node.right)
+        _check_size(type(node.op), left, right)
+        return _check_result(_CALCULATOR_BINOPS[type(node.op)](left, right))
+    raise ValueError("Unsupported expression")
+
+
+@lru_cache(maxsize=1024)
+def safe_eval(expression):
+    """Evaluate an arithmetic expression; raises ValueError on anything else."""
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ValueError("Expression too long")
+    return _eval_node(ast.parse(expression, mode="eval").body)
 
 
 # SLOP components
@@ -81,7 +270,7 @@ tools = {
     "calculator": {
         "id": "calculator",
         "description": "Basic math",
-        "execute": lambda params: {"result": eval(params["expression"])},
+        "execute": lambda params: {"result": safe_eval(params["expression"])},
     },
     "greet": {
         "id": "greet",
@@ -91,130 +280,164 @@ tools = {
 }
 resources = {"hello": {"id": "hello", "content": "Hello, SLOP!"}}
 
+# tools and resources are static, so their listings are serialized once
+_TOOLS_RESPONSE = orjson.dumps(
+    {"tools": [{"id": k, "description": v["description"]} for k, v in tools.items()]}
+)
+_RESOURCES_RESPONSE = orjson.dumps({"resources": list(resources.values())})
+
+
+def ojsonify(obj, status=200):
+    """Like jsonify, but encodes with orjson."""
+    try:
+        body = orjson.dumps(obj)
+    except orjson.JSONEncodeError as e:
+        # orjson only handles 64-bit integers; calculator results and stored
+        # memory values can be larger
+        if str(e) != "Integer exceeds 64-bit range":
+            raise
+        body = json.dumps(obj).encode()
+    return Response(body, mimetype="application/json"), status
+
+
+def stream_chat(client, model_id, messages):
+    """Stream a chat completion as server-sent events carrying content deltas."""
+
+    async def events():
+        try:
+            stream = await client.chat.completions.create(
+                model=model_id, messages=messages, stream=True
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    delta = {"delta": {"content": chunk.choices[0].delta.content}}
+                    yield b"data: " + orjson.dumps({"choices": [delta]}) + b"\n\n"
+        except Exception as e:
+            logger.error("Chat error with model %s: %s", model_id, e)
+            yield b"data: " + orjson.dumps({"error": str(e)}) + b"\n\n"
+        yield b"data: [DONE]\n\n"
+
+    response = Response(events(), mimetype="text/event-stream")
+    response.timeout = None  # Generations can outlast Quart's response timeout
+    return response
+
 
 # Endpoints
 @app.route("/chat", methods=["POST"])
-def chat():
-    data = request.json
+async def chat():
+    data = await request.get_json()
     message = data["messages"][0]["content"] if data.get("messages") else "nothing"
-    model_id = data.get("model") or (
-        list(MODEL_CLIENT_MAP.keys())[0] if MODEL_CLIENT_MAP else None
-    )
+    model_id = data.get("model") or DEFAULT_MODEL
     if not model_id or model_id not in MODEL_CLIENT_MAP:
-        logger.error(f"Invalid or missing model_id: {model_id}")
-        return jsonify({"error": "Model not found"}), 404
+        logger.error("Invalid or missing model_id: %s", model_id)
+        return ojsonify({"error": "Model not found"}, 404)
     client = MODEL_CLIENT_MAP[model_id]
+    messages = [
+        {"role": m["role"], "content": m["content"]} for m in data.get("messages", [])
+    ] or [{"role": "user", "content": message}]
+    if data.get("stream"):
+        return stream_chat(client, model_id, messages)
     try:
-        response = client.chat.completions.create(
-            model=model_id,
-            messages=[
-                {"role": m["role"], "content": m["content"]}
-                for m in data.get("messages", [])
-            ]
-            or [{"role": "user", "content": message}],
-        )
-        logger.debug(
-            f"Chat response for model {model_id}: {response.choices[0].message.content}"
-        )
-        return (
-            jsonify(
-                {
-                    "choices": [
-                        {"message": {"content": response.choices[0].message.content}}
-                    ]
-                }
-            ),
-            200,
+        response = await client.chat.completions.create(
+            model=model_id, messages=messages
         )
+        content = response.choices[0].message.content
+        logger.debug("Chat response for model %s: %s", model_id, content)
+        return ojsonify({"choices": [{"message": {"content": content}}]})
     except Exception as e:
-        logger.error(f"Chat error with model {model_id}: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+        logger.error("Chat error with model %s: %s", model_id, e)
+        return ojsonify({"error": str(e)}, 500)
 
 
 @app.route("/models", methods=["GET"])
-def list_models():
-    models = list(MODEL_CLIENT_MAP.keys())
-    logger.debug(f"Returning models: {models}")
-    return jsonify({"models": models}), 200
+async def list_models():
+    return Response(_MODELS_JSON, mimetype="application/json"), 200
 
 
 @app.route("/tools", methods=["GET"])
-def list_tools():
-    return (
-        jsonify(
-            {
-                "tools": [
-                    {"id": k, "description": v["description"]} for k, v in tools.items()
-                ]
-            }
-        ),
-        200,
-    )
+async def list_tools():
+    return Response(_TOOLS_RESPONSE, mimetype="application/json"), 200
 
 
-@app.route("/tools/<tool_id>", methods=["POST"])
-def use_tool(tool_id):
+@app.route("/tools/<string:tool_id>", methods=["POST"])
+async def use_tool(tool_id):
     if tool_id not in tools:
-        return jsonify({"error": "Tool not found"}), 404
-    data = request.json or {}
+        return ojsonify({"error": "Tool not found"}, 404)
+    data = await request.get_json() or {}
     if tool_id == "calculator" and "expression" not in data:
-        return jsonify({"error": "Missing 'expression'"}), 400
+        return ojsonify({"error": "Missing 'expression'"}, 400)
     if tool_id == "greet" and "name" not in data:
-        return jsonify({"error": "Missing 'name'"}), 400
-    result = tools[tool_id]["execute"](data)
-    return jsonify(result), 200
+        return ojsonify({"error": "Missing 'name'"}, 400)
+    try:
+        result = tools[tool_id]["execute"](data)
+    except (SyntaxError, TypeError, ValueError, ArithmeticError, RecursionError) as e:
+        return ojsonify({"error": str(e)}, 400)
+    return ojsonify(result)
 
 
-@app.route("/memory", methods=["POST"])
-def store_memory():
-    data = request.json
+# Memory routes live on their own blueprint to keep the app's routing table shallow
+memory_bp = Blueprint("memory", __name__, url_prefix="/memory")
+
+
+@memory_bp.route("", methods=["POST"])
+async def store_memory():
+    data = await request.get_json()
     memory[data["key"]] = data["value"]
-    return jsonify({"status": "stored"}), 200
+    return ojsonify({"status": "stored", "keys": list(memory.keys())})
 
 
-@app.route("/memory/<key>", methods=["GET"])
-def get_memory(key):
-    return jsonify({"value": memory.get(key)}), 200
+@memory_bp.route("/<string:key>", methods=["GET"])
+async def get_memory(key):
+    return ojsonify({"value": memory.get(key)})
 
 
-@app.route("/memory", methods=["GET"])
-def list_memory():
-    return jsonify({"keys": list(memory.keys())}), 200
+@memory_bp.route("", methods=["GET"])
+async def list_memory():
+    return ojsonify({"keys": list(memory.keys())})
 
 
-@app.route("/memory/<key>", methods=["DELETE"])
-def delete_memory(key):
+@memory_bp.route("/<string:key>", methods=["DELETE"])
+async def delete_memory(key):
     if key not in memory:
-        return jsonify({"error": "Key not found"}), 404
+        return ojsonify({"error": "Key not found"}, 404)
     del memory[key]
-    return jsonify({"status": "deleted"}), 200
+    return ojsonify({"status": "deleted", "keys": list(memory.keys())})
+
+
+app.register_blueprint(memory_bp)
 
 
 @app.route("/resources", methods=["GET"])
-def list_resources():
-    return jsonify({"resources": list(resources.values())}), 200
+async def list_resources():
+    return Response(_RESOURCES_RESPONSE, mimetype="application/json"), 200
 
 
-@app.route("/resources/<resource_id>", methods=["GET"])
-def get_resource(resource_id):
+@app.route("/resources/<string:resource_id>", methods=["GET"])
+async def get_resource(resource_id):
     if resource_id not in resources:
-        return jsonify({"error": "Resource not found"}), 404
-    return jsonify(resources[resource_id]), 200
+        return ojsonify({"error": "Resource not found"}, 404)
+    return ojsonify(resources[resource_id])
 
 
 @app.route("/pay", methods=["POST"])
-def pay():
-    return (
-        jsonify(
-            {
-                "transaction_id": f"tx_{int(datetime.now().timestamp())}",
-                "status": "success",
-            }
-        ),
-        200,
+async def pay():
+    return ojsonify(
+        {
+            "transaction_id": f"tx_{int(time.time())}",
+            "status": "success",
+        }
     )
 
 
 if __name__ == "__main__":
-    initialize_model_map()
-    app.run(debug=True, port=31337)
+    if os.environ.get("SLOP_DEV"):
+        app.run(debug=True, port=31337)
+    else:
+        # Same as `hypercorn asgi:app --bind 127.0.0.1:31337 --keep-alive 30`
+        from hypercorn.asyncio import serve
+        from hypercorn.config import Config
+
+        config = Config()
+        config.bind = ["127.0.0.1:31337"]
+        config.keep_alive_timeout = 30
+        asyncio.run(serve(app, config))
@@ -1,39 +1,68 @@
 # streamlit_slop_with_models.py
+from collections import deque
+from itertools import islice
 import streamlit as st
-import requests
-
-BASE_URL = "http://localhost:31337"
+from slop_client import (
+    DOCS_URL,
+    RequestException,
+    call_tool,
+    clear_listings,
+    delete_memory,
+    fetch_memory,
+    fetch_memory_keys,
+    fetch_models,
+    fetch_resource,
+    fetch_resources,
+    fetch_tools,
+    pay,
+    prefetch_listings,
+    store_memory,
+    stream_chat,
+)
+
+PAGE_SIZE = 20  # Chat turns (user message plus reply) rendered per page of history
+MAX_TURNS = 50  # Chat turns kept per session and sent as context
+
+
+# Session-scoped, so each history is dropped when its browser session disconnects
+@st.cache_resource(scope="session")
+def history_store():
+    """Chat history for one browser session, kept out of st.session_state."""
+    return deque(maxlen=MAX_TURNS)
+
+
+def chat_messages(history, message):
+    """Build the /chat messages from the stored turns plus the new message."""
+    messages = []
+    for entry in history:
+        messages.append({"role": "user", "content": entry["user"]})
+        messages.append({"role": "assistant", "content": entry["assistant"]})
+    messages.append({"role": "user", "content": message})
+    return messages
 
 
 def main():
     st.title("SLOP Streamlit with Dynamic Models")
     st.markdown(
-        "[Explore API Documentation](http://localhost:31337/openapi/)",
+        f"[Explore API Documentation]({DOCS_URL})",
         unsafe_allow_html=True,
     )
-    page = st.sidebar.selectbox(
-        "Choose a feature", ["Chat", "Tools", "Memory", "Resources", "Pay"]
-    )
-    if page == "Chat":
-        chat_interface()
-    elif page == "Tools":
-        tools_interface()
-    elif page == "Memory":
-        memory_interface()
-    elif page == "Resources":
-        resources_interface()
-    elif page == "Pay":
-        pay_interface()
+    page = st.sidebar.selectbox("Choose a feature", list(PAGES))
+    refresh = st.sidebar.button("Refresh")
+    if refresh:
+        clear_listings()
+    if refresh or "listings_prefetched" not in st.session_state:
+        prefetch_listings()
+        st.session_state.listings_prefetched = True
+    PAGES[page]()
 
 
 def chat_interface():
     st.header("Chat")
 
     try:
-        response = requests.get(f"{BASE_URL}/models", timeout=5)
-        response.raise_for_status()
-        models = response.json()["models"]
-    except requests.RequestException as e:
+        models = fetch_models()
+    except RequestException as e:
         st.warning(f"Could not fetch models: {str(e)}")
         models = []
 
@@ -41,59 +70,55 @@ def chat_interface():
         "Select Model", models if models else ["No models available"]
     )
 
-    if "chat_history" not in st.session_state:
-        st.session_state.chat_history = []
-
-    for entry in st.session_state.chat_history:
-        st.write(f"**User**: {entry['user']}")
-        st.write(f"**Assistant**: {entry['assistant']}")
-
-    with st.form(key="chat_form", clear_on_submit=True):
-        message = st.text_area("Enter your message", height=100, key="chat_input")
-        submit_button = st.form_submit_button(label="Submit", type="primary")
-
-        st.markdown(
-            """
-            <script>
-            const textarea = document.querySelector('textarea');
-            textarea.addEventListener('keydown', function(event) {
-                if (event.key === 'Enter' && !event.shiftKey) {
-                    event.preventDefault();
-                    document.querySelector('button[type="submit"]').click();
-                }
-            });
-            </script>
-        """,
-            unsafe_allow_html=True,
-        )
-
-        if submit_button and message and models:
-            try:
-                response = requests.post(
-                    f"{BASE_URL}/chat",
-                    json={
-                        "messages": [{"role": "user", "content": message}],
-                        "model": selected_model,
-                    },
-                    timeout=5,
-                )
-                response.raise_for_status()
-                assistant_response = response.json()["choices"][0]["message"]["content"]
-                st.session_state.chat_history.append(
-                    {"user": message, "assistant": assistant_response}
+    chat_panel(selected_model, models)
+
+
+@st.fragment
+def chat_panel(selected_model, models):
+    """History and message input; reruns on its own without the rest of the page."""
+    history = history_store()
+    st.session_state.setdefault("history_offset", PAGE_SIZE)
+
+    if len(history) > st.session_state.history_offset:
+        if st.button("Load older messages"):
+            st.session_state.history_offset += PAGE_SIZE
+            st.rerun(scope="fragment")
+
+    for entry in islice(
+        history, max(0, len(history) - st.session_state.history_offset), None
+    ):
+        with st.chat_message("user"):
+            st.write(entry["user"])
+        with st.chat_message("assistant"):
+            st.write(entry["assistant"])
+
+    if error := st.session_state.pop("chat_error", None):
+        st.error(f"Error: {error}")
+
+    # "disable" locks the input from submit until this run finishes, so the reply
+    # streams before another message can be sent
+    message = st.chat_input(
+        "Enter your message", submit_mode="disable", disabled=not models
+    )
+    if message:
+        try:
+            with st.chat_message("user"):
+                st.write(message)
+            with st.chat_message("assistant"):
+                assistant_response = st.write_stream(
+                    stream_chat(chat_messages(history, message), selected_model)
                 )
-                st.rerun()
-            except requests.RequestException as e:
-                st.error(f"Error: {str(e)}")
+            history.append({"user": message, "assistant": assistant_response})
+        except RequestException as e:
+            st.session_state.chat_error = str(e)
+        st.rerun(scope="fragment")
 
 
 def tools_interface():
     st.header("Tools")
     try:
-        response = requests.get(f"{BASE_URL}/tools", timeout=5)
-        response.raise_for_status()
-        tools = response.json()["tools"]
-    except requests.RequestException as e:
+        tools = fetch_tools()
+    except RequestException as e:
         st.warning(f"Could not fetch tools: {str(e)}")
         tools = []
 
@@ -101,33 +126,35 @@ def tools_interface():
         st.write("No tools available.")
         return
 
-    tool_id = st.selectbox("Select a tool", [t["id"] for t in tools])
+    tool_ids = tuple(t["id"] for t in tools)
+    tool_id = st.selectbox("Select a tool", tool_ids)
+    TOOL_HANDLERS.get(tool_id, unsupported_tool_ui)(tool_id)
 
-    if tool_id == "calculator":
-        expression = st.text_input("Enter expression (e.g., 2 + 2)")
-        if st.button("Calculate"):
-            try:
-                response = requests.post(
-                    f"{BASE_URL}/tools/{tool_id}",
-                    json={"expression": expression},
-                    timeout=5,
-                )
-                response.raise_for_status()
-                st.write(f"Result: {response.json()['result']}")
-            except requests.RequestException as e:
-                st.error(f"Error: {str(e)}")
 
-    elif tool_id == "greet":
-        name = st.text_input("Enter name")
-        if st.button("Greet"):
-            try:
-                response = requests.post(
-                    f"{BASE_URL}/tools/{tool_id}", json={"name": name}, timeout=5
-                )
-                response.raise_for_status()
-                st.write(response.json()["result"])
-            except requests.RequestException as e:
-                st.error(f"Error: {str(e)}")
+def calculator_ui(tool_id):
+    expression = st.text_input("Enter expression (e.g., 2 + 2)")
+    if st.button("Calculate"):
+        try:
+            result = call_tool(tool_id, {"expression": expression})
+            st.write(f"Result: {result}")
+        except RequestException as e:
+            st.error(f"Error: {str(e)}")
+
+
+def greet_ui(tool_id):
+    name = st.text_input("Enter name")
+    if st.button("Greet"):
+        try:
+            st.write(call_tool(tool_id, {"name": name}))
+        except RequestException as e:
+            st.error(f"Error: {str(e)}")
+
+
+def unsupported_tool_ui(tool_id):
+    st.write(f"Unsupported tool: {tool_id}")
+
+
+TOOL_HANDLERS = {"calculator": calculator_ui, "greet": greet_ui}
 
 
 def memory_interface():
@@ -139,61 +166,45 @@ def memory_interface():
         value = st.text_input("Value")
         if st.button("Store"):
             try:
-                response = requests.post(
-                    f"{BASE_URL}/memory", json={"key": key, "value": value}, timeout=5
-                )
-                response.raise_for_status()
+                keys = store_memory(key, value)
                 st.success("Stored successfully!")
-                list_response = requests.get(f"{BASE_URL}/memory", timeout=5)
-                list_response.raise_for_status()
-                keys = list_response.json()["keys"]
                 st.write("Current Memory Keys:", ", ".join(keys) if keys else "None")
-            except requests.RequestException as e:
+            except RequestException as e:
                 st.error(f"Error: {str(e)}")
 
     elif action == "Retrieve":
         key = st.text_input("Key to retrieve")
         if st.button("Retrieve"):
             try:
-                response = requests.get(f"{BASE_URL}/memory/{key}", timeout=5)
-                response.raise_for_status()
-                value = response.json()["value"]
+                value = fetch_memory(key)
                 st.write(f"Value: {value if value is not None else 'Not found'}")
-            except requests.RequestException as e:
+            except RequestException as e:
                 st.error(f"Error: {str(e)}")
 
     elif action == "List":
         if st.button("List All Keys"):
             try:
-                response = requests.get(f"{BASE_URL}/memory", timeout=5)
-                response.raise_for_status()
-                keys = response.json()["keys"]
+                keys = fetch_memory_keys()
                 st.write("Memory Keys:", ", ".join(keys) if keys else "None")
-            except requests.RequestException as e:
+            except RequestException as e:
                 st.error(f"Error: {str(e)}")
 
     elif action == "Delete":
         key = st.text_input("Key to delete")
         if st.button("Delete"):
             try:
-                response = requests.delete(f"{BASE_URL}/memory/{key}", timeout=5)
-                response.raise_for_status()
+                keys = delete_memory(key)
                 st.success("Deleted successfully!")
-                list_response = requests.get(f"{BASE_URL}/memory", timeout=5)
-                list_response.raise_for_status()
-                keys = list_response.json()["keys"]
                 st.write("Current Memory Keys:", ", ".join(keys) if keys else "None")
-            except requests.RequestException as e:
+            except RequestException as e:
                 st.error(f"Error: {str(e)}")
 
 
 def resources_interface():
     st.header("Resources")
     try:
-        response = requests.get(f"{BASE_URL}/resources", timeout=5)
-        response.raise_for_status()
-        resources = response.json()["resources"]
-    except requests.RequestException as e:
+        resources = fetch_resources()
+    except RequestException as e:
         st.warning(f"Could not fetch resources: {str(e)}")
         resources = []
 
@@ -204,10 +215,9 @@ def resources_interface():
     resource_id = st.selectbox("Select resource", [r["id"] for r in resources])
     if st.button("Get Resource"):
         try:
-            response = requests.get(f"{BASE_URL}/resources/{resource_id}", timeout=5)
-            response.raise_for_status()
-            st.write(response.json().get("content", response.json()))
-        except requests.RequestException as e:
+            resource = fetch_resource(resource_id)
+            st.write(resource.get("content", resource))
+        except RequestException as e:
             st.error(f"Error: {str(e)}")
 
 
@@ -216,15 +226,22 @@ def pay_interface():
     amount = st.number_input("Amount", min_value=0.0, step=0.01)
     if st.button("Pay"):
         try:
-            response = requests.post(
-                f"{BASE_URL}/pay", json={"amount": amount}, timeout=5
+            data = pay(amount)
+            st.write(
+                f"Transaction ID: {data['transaction_id']}  \nStatus: {data['status']}"
             )
-            response.raise_for_status()
-            st.write(f"Transaction ID: {response.json()['transaction_id']}")
-            st.write(f"Status: {response.json()['status']}")
-        except requests.RequestException as e:
+        except RequestException as e:
             st.error(f"Error: {str(e)}")
 
 
+PAGES = {
+    "Chat": chat_interface,
+    "Tools": tools_interface,
+    "Memory": memory_interface,
+    "Resources": resources_interface,
+    "Pay": pay_interface,
+}
+
+
 if __name__ == "__main__":
     main()
@@ -1,4 +1,5 @@
-import requests
+import aiohttp
+import asyncio
 import json
 import argparse
 
@@ -12,70 +13,79 @@ class ZaAPIProver:
             "resources": "/resources",
             "pay": "/pay"
         }
-        
-    def validate_chat(self):
+        # Created in run_tests, since aiohttp sessions must live inside the event loop
+        self.aio_session = None
+
+    async def validate_chat(self):
         url = f"{self.base_url}{self.endpoints['chat']}"
         payload = {"messages": [{"role": "user", "content": "Hello SLOP!"}]}
-        return self._send_request("POST", url, payload)
+        return await self._send_request("POST", url, payload)
 
-    def validate_tools(self):
+    async def validate_tools(self):
         url = f"{self.base_url}{self.endpoints['tools']}"
-        return self._send_request("GET", url)
+        return await self._send_request("GET", url)
 
-    def validate_memory(self):
+    async def validate_memory(self):
         store_url = f"{self.base_url}{self.endpoints['memory']}"
         get_url = f"{self.base_url}{self.endpoints['memory']}/zap_test"
-        
+
         # Store a test value
         store_payload = {"key": "zap_test", "value": "hello world"}
-        store_response = self._send_request("POST", store_url, store_payload)
-        
-        # Retrieve the stored value
-        get_response = self._send_request("GET", get_url)
-        
+        store_response = await self._send_request("POST", store_url, store_payload)
+
+        # Retrieve the stored value (must run after the store completes)
+        get_response = await self._send_request("GET", get_url)
+
         return {"store_response": store_response, "get_response": get_response}
 
-    def validate_resources(self):
+    async def validate_resources(self):
         url = f"{self.base_url}{self.endpoints['resources']}"
-        return self._send_request("GET", url)
+        return await self._send_request("GET", url)
 
-    def validate_pay(self):
+    async def validate_pay(self):
         url = f"{self.base_url}{self.endpoints['pay']}"
         payload = {"amount": 10}
-        return self._send_request("POST", url, payload)
+        return await self._send_request("POST", url, payload)
 
-    def _send_request(self, method, url, payload=None):
+    async def _send_request(self, method, url, payload=None):
+        if method not in ("GET", "POST"):
+            return {"error": "Unsupported method"}
         try:
-            if method == "GET":
-                response = requests.get(url)
-            elif method == "POST":
-                response = requests.post(url, json=payload)
-            else:
-                return {"error": "Unsupported method"}
-
-            return {
-                "status_code": response.status_code,
-                "response": response.json() if response.content else {}
-            }
+            async with self.aio_session.request(method, url, json=payload) as response:
+                body = await response.read()
+                return {
+                    "status_code": response.status,
+                    "response": json.loads(body) if body else {}
+                }
         except Exception as e:
             return {"error": str(e)}
 
-    def run_tests(self):
-        results = {
-            "chat": self.validate_chat(),
-            "tools": self.validate_tools(),
-            "memory": self.validate_memory(),
-            "resources": self.validate_resources(),
-            "pay": self.validate_pay()
+    async def run_tests(self):
+        timeout = aiohttp.ClientTimeout(total=10)
+        async with aiohttp.ClientSession(timeout=timeout) as self.aio_session:
+            # The checks are independent, so run them concurrently
+            chat, tools, memory, resources, pay = await asyncio.gather(
+                self.validate_chat(),
+                self.validate_tools(),
+                self.validate_memory(),
+                self.validate_resources(),
+                self.validate_pay()
+            )
+        self.aio_session = None
+        return {
+            "chat": chat,
+            "tools": tools,
+            "memory": memory,
+            "resources": resources,
+            "pay": pay
         }
-        return results
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Za API Prover (ZAP) - SLOP Validator")
     parser.add_argument("url", type=str, help="Base URL of the SLOP server")
     args = parser.parse_args()
-    
+
     prover = ZaAPIProver(args.url)
-    test_results = prover.run_tests()
-    
+    test_results = asyncio.run(prover.run_tests())
+
     print(json.dumps(test_results, indent=2))